@@ -0,0 +1,24 @@
+"""
+================================================================
+파일명       : dependencies.py
+목적         : 라우터 공통 FastAPI 의존성
+설명         :
+  - get_workspace_id: X-Workspace-ID 헤더 → 워크스페이스 ID
+  - 모든 라우터가 같은 의존성 함수를 공유하므로 요청 내에서는 한 번만 해석됨
+================================================================
+"""
+
+from fastapi import Header
+
+
+def get_workspace_id(x_workspace_id: str = Header(..., alias="X-Workspace-ID")) -> str:
+    """
+    요청 헤더에서 워크스페이스 ID를 꺼내는 의존성 함수
+
+    Args:
+        x_workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
+
+    Returns:
+        str: 워크스페이스 고유 식별자
+    """
+    return x_workspace_id
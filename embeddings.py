@@ -0,0 +1,108 @@
+"""
+================================================================
+파일명       : embeddings.py
+목적         : 임베딩 저장 형식 변환 유틸리티
+설명         :
+  - quantize_embedding: float 임베딩 → int8 + 스케일 (MongoDB 저장용)
+  - decode_embedding: 태스크 문서 → float 임베딩 목록 (API 응답용)
+  - embedding_matrix: 태스크 문서 목록 → (N, D) float32 행렬 (PCA용)
+  - embedding_text / embedding_key: 임베딩 입력 텍스트와 그 해시 (재생성 여부 판단용)
+  - 기존 float 배열(embedding) 형식 문서도 함께 지원
+================================================================
+"""
+
+import hashlib
+import numpy as np
+from bson import Binary
+
+# 임베딩이 저장된 태스크만 조회하는 필터 (int8 형식 + 기존 float 배열 형식)
+HAS_EMBEDDING_FILTER = {
+    "$or": [
+        {"embedding_q": {"$type": "binData"}},
+        {"embedding.0": {"$exists": True}},
+    ]
+}
+
+# 임베딩 관련 필드 projection
+EMBEDDING_PROJECTION = {"embedding": 1, "embedding_q": 1, "embedding_scale": 1}
+
+# 임베딩을 제외한 태스크 조회 projection
+EXCLUDE_EMBEDDING_PROJECTION = {
+    "_id": 0, "embedding": 0, "embedding_q": 0, "embedding_scale": 0, "embedding_key": 0,
+}
+
+
+def embedding_text(title: str, description: str | None, tags: list[str]) -> str:
+    """태스크의 임베딩 입력 텍스트 (제목 + 설명 + 태그)"""
+    return f"{title} {description or ''} {' '.join(tags)}"
+
+
+def embedding_key(text: str) -> str:
+    """
+    임베딩 입력 텍스트의 해시 (태스크 문서에 embedding_key로 함께 저장)
+    저장된 값과 같으면 내용이 바뀌지 않은 것이므로 임베딩을 다시 만들지 않음
+
+    Args:
+        text: embedding_text()로 만든 입력 텍스트
+
+    Returns:
+        str: 32자리 16진수 해시
+    """
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def quantize_embedding(embedding: list[float]) -> dict:
+    """
+    float 임베딩을 벡터별 스케일을 가진 int8로 양자화하는 함수
+    (BSON double 8바이트 → 1바이트)
+
+    Args:
+        embedding: float 임베딩 벡터
+
+    Returns:
+        dict: 태스크 문서에 $set할 필드 { embedding_q, embedding_scale }
+              (임베딩이 없으면 두 값 모두 None)
+    """
+    if not embedding:
+        return {"embedding_q": None, "embedding_scale": None}
+
+    vector = np.asarray(embedding, dtype=np.float32)
+    scale = float(np.abs(vector).max()) / 127 or 1.0
+    quantized = np.round(vector / scale).astype(np.int8)
+    return {"embedding_q": Binary(quantized.tobytes()), "embedding_scale": scale}
+
+
+def _decode_vector(doc: dict) -> np.ndarray:
+    """태스크 문서의 임베딩을 float32 벡터로 복원하는 내부 함수"""
+    if doc.get("embedding_q") is not None:
+        quantized = np.frombuffer(doc["embedding_q"], dtype=np.int8)
+        return quantized.astype(np.float32) * doc["embedding_scale"]
+    return np.asarray(doc.get("embedding") or [], dtype=np.float32)
+
+
+def decode_embedding(doc: dict) -> list[float]:
+    """
+    태스크 문서에서 float 임베딩 목록을 복원하는 함수
+
+    Args:
+        doc: MongoDB 태스크 문서
+
+    Returns:
+        list[float]: 임베딩 벡터 (없으면 빈 리스트)
+    """
+    return _decode_vector(doc).tolist()
+
+
+def embedding_matrix(docs: list[dict]) -> np.ndarray:
+    """
+    임베딩이 있는 태스크 문서 목록을 (N, D) float32 행렬로 변환하는 함수
+
+    Args:
+        docs: HAS_EMBEDDING_FILTER로 조회한 태스크 문서 목록
+
+    Returns:
+        np.ndarray: (N, D) 임베딩 행렬
+    """
+    if not docs:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack([_decode_vector(doc) for doc in docs])
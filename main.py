@@ -3,24 +3,34 @@
 파일명       : main.py
 목적         : FastAPI 애플리케이션 진입점
 설명         :
-  - FastAPI 앱 인스턴스 생성 및 설정
+  - FastAPI 앱 인스턴스 생성 및 설정 (orjson 응답 직렬화)
   - CORS 미들웨어 설정 (프론트엔드 요청 허용)
-  - MongoDB 연결 및 컬렉션 정의
+  - MongoDB 연결 (Motor 비동기 드라이버) 및 컬렉션 정의
+  - 앱 시작 시 컬렉션 인덱스 생성 (MongoDB 연결 실패 시 재시도, 끝내 실패하면 시작 중단)
   - 라우터 등록 (tasks, edges, tags, graph)
   - 기본 라우트 및 헬스체크 API
 ================================================================
 """
 
 import os
+import asyncio
 import logging
+from datetime import datetime
+from contextlib import asynccontextmanager
+import numpy as np
+from cachetools import LRUCache
 from google import genai
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pymongo import MongoClient
+from fastapi.responses import ORJSONResponse
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DeleteOne, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
+from embeddings import embedding_key
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+# 로깅 설정 (운영 환경에서는 LOG_LEVEL=WARNING 권장)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 # 라우터 임포트
@@ -29,8 +39,43 @@ from routes import tasks, edges, tags, graph
 # 환경변수 로드
 load_dotenv()
 
-# FastAPI 앱 생성
-app = FastAPI(title="Linkdo API")
+# 시작 시 MongoDB 준비(연결 확인 + 인덱스 생성) 재시도 설정
+# MongoDB가 늦게 뜨는 경우를 위해 대기 시간을 두 배씩 늘리며 재시도하고,
+# 끝내 실패하면 앱 시작을 실패시켜 오케스트레이터가 재시작하도록 함
+# (중복 방지를 unique 인덱스에 맡기므로 인덱스 없이 요청을 받으면 안 됨)
+STARTUP_RETRIES = 8
+STARTUP_RETRY_DELAY = 1
+STARTUP_RETRY_MAX_DELAY = 30
+
+
+async def prepare_database():
+    """MongoDB 연결 확인 후 인덱스 생성 및 엣지 방향 정렬 (연결 오류는 호출 측으로 전달)"""
+    await client.admin.command("ping")
+    await create_indexes()
+    await normalize_edge_direction()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 시작 시 MongoDB 연결 확인 및 인덱스 생성 (연결 실패 시 재시도), 종료 시 연결 해제"""
+    delay = STARTUP_RETRY_DELAY
+    for attempt in range(1, STARTUP_RETRIES + 1):
+        try:
+            await prepare_database()
+            break
+        except ConnectionFailure as e:
+            if attempt == STARTUP_RETRIES:
+                logger.error(f"MongoDB 준비 실패 ({attempt}회 시도), 시작 중단: {e}")
+                raise
+            logger.warning(f"MongoDB 준비 실패 ({attempt}/{STARTUP_RETRIES}), {delay}초 후 재시도: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+    yield
+    client.close()
+
+
+# FastAPI 앱 생성 (기본 응답 직렬화: orjson)
+app = FastAPI(title="Linkdo API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # HTTPS 스킴 강제 미들웨어 (리버스 프록시 환경용)
 @app.middleware("http")
@@ -74,21 +119,137 @@ gemini_client = None
 if GEMINI_API_KEY:
     gemini_client = genai.Client(api_key=GEMINI_API_KEY)
 
-# MongoDB 연결
+# MongoDB 연결 (Motor 비동기 드라이버)
+# - 풀 크기: 워커 하나의 동시 요청 수에 맞춤, 최소 연결은 유지해 콜드 연결 지연 방지
+# - 유휴 연결: 60초 이상 쓰지 않은 연결은 정리 (minPoolSize 아래로는 줄지 않음)
+# - 클라이언트는 프로세스당 하나만 생성 (요청마다 만들지 말 것)
+# - 타임아웃: DB 장애 시 /health 등이 기본값(30초)만큼 대기하지 않도록 짧게 설정
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/linkdo")
-client = MongoClient(MONGO_URI)
+client = AsyncIOMotorClient(
+    MONGO_URI,
+    maxPoolSize=50,
+    minPoolSize=5,
+    maxIdleTimeMS=60000,
+    serverSelectionTimeoutMS=2000,
+    connectTimeoutMS=2000,
+    socketTimeoutMS=10000,
+    retryWrites=True,
+)
 db = client["linkdo"]
 
 # 컬렉션
 tasks_collection = db["tasks"]
 edges_collection = db["edges"]
+workspaces_collection = db["workspaces"]
+migrations_collection = db["migrations"]  # 완료된 일회성 데이터 마이그레이션 기록
+
+
+async def create_indexes():
+    """
+    조회 조건에 맞는 인덱스 생성 (이미 존재하면 무시됨)
+    인덱스별로 생성하여 조회용 인덱스 하나가 실패해도 나머지는 생성됨
+    중복 방지를 맡는 필수(unique) 인덱스가 실패하면 (예: 기존 중복 데이터) 예외를 그대로 올려 시작을 중단함
+
+    - tasks (workspace_id, id): 모든 단건 조회/수정/삭제
+    - tasks (workspace_id, tags): 태그 필터 조회, 태그 목록 distinct (multikey)
+    - edges (workspace_id, source, target) unique: 엣지 중복 방지, source 기준 조회
+    - edges (workspace_id, target, source): target 기준 조회 (태스크 삭제 시 연결된 엣지 정리)
+      (이전의 (workspace_id, target) 인덱스를 대체하므로 남아 있으면 삭제)
+    """
+    # (컬렉션, 인덱스, 필수 여부)
+    indexes = [
+        # create_task는 사전 조회 없이 이 인덱스의 중복 키 오류로 중복 ID를 판별
+        (tasks_collection, IndexModel([("workspace_id", ASCENDING), ("id", ASCENDING)], unique=True), True),
+        (tasks_collection, IndexModel([("workspace_id", ASCENDING), ("tags", ASCENDING)]), False),
+        # create_edge / 태그 자동 연결도 사전 조회 없이 이 인덱스로 중복 엣지를 막음
+        (edges_collection, IndexModel(
+            [("workspace_id", ASCENDING), ("source", ASCENDING), ("target", ASCENDING)], unique=True,
+        ), True),
+        (edges_collection, IndexModel(
+            [("workspace_id", ASCENDING), ("target", ASCENDING), ("source", ASCENDING)],
+        ), False),
+    ]
+    for collection, index, required in indexes:
+        name = f"{collection.name}.{index.document['name']}"
+        try:
+            await collection.create_indexes([index])
+        except ConnectionFailure:
+            raise
+        except Exception as e:
+            if required:
+                logger.error(f"필수 인덱스 생성 실패 ({name}), 시작 중단: {e}")
+                raise
+            logger.warning(f"인덱스 생성 실패 ({name}): {e}")
+
+    # 새 인덱스의 접두사와 겹쳐 쓰기 비용만 늘리는 이전 인덱스 정리
+    try:
+        if "workspace_id_1_target_1" in await edges_collection.index_information():
+            await edges_collection.drop_index("workspace_id_1_target_1")
+    except ConnectionFailure:
+        raise
+    except Exception as e:
+        logger.warning(f"인덱스 삭제 실패 (edges.workspace_id_1_target_1): {e}")
+
+
+async def _mark_migration_done(migration_id: str):
+    """일회성 마이그레이션 완료를 기록하는 내부 함수 (여러 인스턴스가 동시에 기록해도 안전)"""
+    await migrations_collection.update_one(
+        {"_id": migration_id},
+        {"$setOnInsert": {"completed_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+async def normalize_edge_direction():
+    """
+    source > target 순서로 저장된 이전 엣지를 source < target 순서로 뒤집는 일회성 마이그레이션 함수
+    반대 방향 엣지가 이미 있어 unique 인덱스와 충돌하면 중복이므로 뒤집지 않고 삭제
+    (인덱스를 쓸 수 없는 전체 스캔이므로, 완료 기록이 있으면 건너뜀)
+    """
+    migration_id = "edge_direction_normalized"
+    try:
+        if await migrations_collection.find_one({"_id": migration_id}, {"_id": 1}):
+            return
+
+        reversed_edges = await edges_collection.find(
+            {"$expr": {"$gt": ["$source", "$target"]}},
+            {"_id": 1, "workspace_id": 1, "source": 1, "target": 1},
+        ).to_list(length=None)
+        if not reversed_edges:
+            await _mark_migration_done(migration_id)
+            return
+
+        operations = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"source": doc["target"], "target": doc["source"]}})
+            for doc in reversed_edges
+        ]
+        duplicates = []
+        try:
+            await edges_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != 11000 for error in errors):
+                raise
+            duplicates = [reversed_edges[error["index"]] for error in errors]
+        if duplicates:
+            await edges_collection.bulk_write([DeleteOne({"_id": doc["_id"]}) for doc in duplicates])
+
+        # 엣지 응답이 바뀐 워크스페이스의 그래프 ETag 갱신
+        for workspace_id in {doc.get("workspace_id") for doc in reversed_edges} - {None}:
+            await graph.bump_workspace_version(workspace_id)
+        await _mark_migration_done(migration_id)
+        logger.info(f"엣지 방향 정렬: {len(reversed_edges)}개 (중복 삭제 {len(duplicates)}개)")
+    except ConnectionFailure:
+        raise
+    except Exception as e:
+        logger.warning(f"엣지 방향 정렬 실패: {e}")
 
 # 라우터에 컬렉션/클라이언트 주입
 tasks.set_collections(tasks_collection, edges_collection)
 edges.set_collection(edges_collection)
 tags.set_collection(tasks_collection)
 tags.set_gemini_client(gemini_client)
-graph.set_collections(tasks_collection, edges_collection)
+graph.set_collections(tasks_collection, edges_collection, workspaces_collection)
 
 # 라우터 등록
 app.include_router(tasks.router)
@@ -99,16 +260,16 @@ app.include_router(graph.router)
 
 @app.get("/")
 async def root(request: Request):
-    """루트 엔드포인트 - API 상태 확인 및 헤더 로깅"""
-    logger.info(f"Root endpoint hit. Headers: {request.headers}")
+    """루트 엔드포인트 - API 상태 확인 및 헤더 로깅 (DEBUG 레벨에서만)"""
+    logger.debug("Root endpoint hit. Headers: %s", request.headers)
     return {"message": "Linkdo API is running"}
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """서버 및 데이터베이스 상태 확인"""
     try:
-        client.admin.command("ping")
+        await client.admin.command("ping")
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
@@ -123,26 +284,58 @@ def debug_gemini():
         "client_initialized": gemini_client is not None,
     }
 
-def get_embedding(text: str) -> list[float]:
+# 임베딩 모델 / batch 요청당 최대 텍스트 수
+EMBEDDING_MODEL = "gemini-embedding-001"
+EMBEDDING_BATCH_SIZE = 100
+
+# 텍스트별 임베딩 캐시 (동일 텍스트 재요청 시 모델 호출 생략, 예: 오프라인 동기화 재전송)
+# { embedding_key(text): np.ndarray(float32) } - 3,072차원 기준 항목당 약 12KB
+EMBEDDING_CACHE_SIZE = 1024
+_embedding_cache: LRUCache = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
+
+
+async def get_embeddings(texts: list[str]) -> list[list[float]]:
     """
-    텍스트를 임베딩 벡터로 변환
-    (tasks.py에서 import하여 사용)
+    여러 텍스트를 임베딩 벡터로 일괄 변환
+    캐시에 없는 텍스트만 EMBEDDING_BATCH_SIZE 단위 batch 요청으로 묶어 동시에 전송
+    (tasks 라우터에 주입하여 사용)
 
     Args:
-        text: 변환할 텍스트
+        texts: 변환할 텍스트 목록
     
     Returns:
-        list[float]: 임베딩 벡터
+        list[list[float]]: 텍스트 순서대로의 임베딩 벡터 목록 (실패 시 빈 벡터)
     """
-    if not gemini_client:
+    if not texts:
         return []
+    if not gemini_client:
+        return [[] for _ in texts]
+
+    keys = [embedding_key(text) for text in texts]
+    vectors = {key: _embedding_cache[key] for key in keys if key in _embedding_cache}
+    missing = list({key: text for key, text in zip(keys, texts) if key not in vectors}.items())
 
+    chunks = [
+        missing[i:i + EMBEDDING_BATCH_SIZE]
+        for i in range(0, len(missing), EMBEDDING_BATCH_SIZE)
+    ]
     try:
-        result = gemini_client.models.embed_content(
-            model="gemini-embedding-001",
-            contents=text,
-        )
-        return result.embeddings[0].values
+        results = await asyncio.gather(*(
+            gemini_client.aio.models.embed_content(
+                model=EMBEDDING_MODEL,
+                contents=[text for _, text in chunk],
+            )
+            for chunk in chunks
+        ))
     except Exception as e:
         print(f"임베딩 생성 실패: {e}")
-        return []
+        return [vectors[key].tolist() if key in vectors else [] for key in keys]
+
+    for chunk, result in zip(chunks, results):
+        for (key, _), embedding in zip(chunk, result.embeddings):
+            vectors[key] = _embedding_cache[key] = np.asarray(embedding.values, dtype=np.float32)
+    return [vectors[key].tolist() for key in keys]
+
+
+# tasks 라우터에 임베딩 함수 주입 (get_embeddings 정의 이후에 실행되어야 함)
+tasks.set_embedding_function(get_embeddings)
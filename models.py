@@ -5,6 +5,7 @@
 설명         :
   - TaskCreate: 새 태스크 생성 시 사용
   - TaskUpdate: 태스크 수정 시 사용 (부분 업데이트 지원)
+  - TaskListResponse: 목록/동기화 응답용 태스크 모델 (임베딩 제외)
   - TaskResponse: API 응답용 태스크 모델
   - EdgeCreate: 새 엣지 생성 시 사용
   - EdgeResponse: API 응답용 엣지 모델
@@ -77,35 +78,47 @@ class TaskUpdate(BaseModel):
     tags: Optional[list[str]] = None
     due_date: Optional[datetime] = None
 
-class TaskResponse(BaseModel):
+class TaskListResponse(BaseModel):
     """
-    API 응답용 태스크 모델
+    목록/동기화 응답용 태스크 모델 (임베딩 제외)
+    저장된 문서에 없는 필드는 기본값으로 채우므로 조회 결과를 그대로 넘겨도 됨
     
     Attributes:
         workspace_id: 워크스페이스 고유 식별자
         id: 태스크 고유 식별자
         title: 태스크 제목
         description: 태스크 설명
-        priority: 우선순위
-        status: 상태
-        category: 카테고리
-        tags: 태그
+        priority: 우선순위 (기본값: medium)
+        status: 상태 (기본값: todo)
+        category: 카테고리 (기본값: general)
+        tags: 태그 (기본값: 빈 리스트)
         due_date: 마감일
         x: PCA 계산된 X 좌표
         y: PCA 계산된 Y 좌표
+        embedding_pending: 임베딩 생성 대기 여부 (True이면 좌표가 아직 반영되지 않음)
     """
     workspace_id: str
     id: str
     title: str
     description: Optional[str] = None
-    priority: Priority
-    status: Status
-    category: str
-    tags: list[str]
-    embedding: list[float] = []
+    priority: Priority = "medium"
+    status: Status = "todo"
+    category: str = "general"
+    tags: list[str] = []
     due_date: Optional[datetime] = None
     x: float = 0.0
     y: float = 0.0
+    embedding_pending: bool = False
+
+
+class TaskResponse(TaskListResponse):
+    """
+    API 응답용 태스크 모델 (TaskListResponse + 임베딩)
+    
+    Attributes:
+        embedding: 임베딩 벡터 (조회하지 않았으면 빈 리스트)
+    """
+    embedding: list[float] = []
 
 # ============================================================
 # Edge 모델
@@ -183,7 +196,7 @@ class SyncResponse(BaseModel):
         sync_stats: 동기화 통계
         synced_at: 동기화 완료 시간
     """
-    tasks: list[TaskResponse]
+    tasks: list[TaskListResponse]
     edges: list["EdgeResponse"]
     sync_stats: dict
     synced_at: datetime
@@ -215,11 +228,11 @@ class EdgeResponse(BaseModel):
         workspace_id: 워크스페이스 고유 식별자
         source: 시작 노드(태스크)의 ID
         target: 끝 노드(태스크)의 ID
-        weight: 연관도
+        weight: 연관도 (기본값: 0.5)
     """
     workspace_id: str
     source: str
     target: str
-    weight: float
+    weight: float = 0.5
 
 
@@ -6,11 +6,15 @@
     GET    /api/edges                   - 전체 엣지 조회
     POST   /api/edges                   - 새 엣지 생성
     DELETE /api/edges/{source}/{target} - 엣지 삭제
+    엣지는 방향이 없으므로 항상 source < target 순서로 저장 (edge_endpoints)
 ================================================================
 """
 
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException
+from dependencies import get_workspace_id
+from pymongo.errors import DuplicateKeyError
 from models import EdgeCreate, EdgeResponse
+from routes.graph import GRAPH_BATCH_SIZE, bump_workspace_version
 
 router = APIRouter(prefix="/api/edges", tags=["edges"])
 
@@ -28,70 +32,72 @@ def set_collection(collection):
     edges_collection = collection
 
 
+def edge_endpoints(source: str, target: str) -> tuple[str, str]:
+    """
+    엣지의 양 끝 ID를 저장 순서(source < target)로 정렬하는 함수
+    어느 방향으로 요청해도 같은 문서를 가리키므로 조회가 (workspace_id, source, target) 등호 조건 하나로 끝남
+
+    Args:
+        source: 한쪽 노드(태스크) ID
+        target: 다른 쪽 노드(태스크) ID
+
+    Returns:
+        tuple[str, str]: (작은 ID, 큰 ID)
+    """
+    return (source, target) if source <= target else (target, source)
+
+
 @router.get("/", response_model=list[EdgeResponse])
-def get_all_edges(x_workspace_id: str = Header(..., alias="X-Workspace-ID")):
+async def get_all_edges(workspace_id: str = Depends(get_workspace_id)):
     """
     전체 엣지 목록을 조회
     
     Args:
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
     
     Returns:
         list[EdgeResponse]: 모든 엣지 목록
     """
-    workspace_id = x_workspace_id
-    
-    edges = list(edges_collection.find({"workspace_id": workspace_id}))
-    result = []
-
-    for edge in edges:
-        edge_dict = {
-            "workspace_id": edge.get("workspace_id"),
-            "source": edge.get("source"),
-            "target": edge.get("target"),
-            "weight": edge.get("weight", 0.5),
-        }
-        result.append(edge_dict)
-    return result
+    # projection 결과를 그대로 반환 (EdgeResponse 검증/기본값은 response_model이 처리)
+    return await edges_collection.find(
+        {"workspace_id": workspace_id},
+        {"_id": 0, "workspace_id": 1, "source": 1, "target": 1, "weight": 1}
+    ).batch_size(GRAPH_BATCH_SIZE).to_list(length=None)
 
 
 @router.post("/", response_model=EdgeResponse)
-def create_edge(
+async def create_edge(
     edge: EdgeCreate,
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
+    workspace_id: str = Depends(get_workspace_id),
 ):
     """
     새 엣지를 생성
 
     Args:
         edge: 생성할 엣지 정보
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
     
     Returns:
         EdgeResponse: 생성된 엣지 정보
     """
-    workspace_id = x_workspace_id
-    
-    # 엣지 중복 연결 체크 (같은 workspace 내에서)
-    existing = edges_collection.find_one({
-        "workspace_id": workspace_id,
-        "source": edge.source,
-        "target": edge.target
-    })
-    if existing:
-        raise HTTPException(status_code=400, detail="이미 존재하는 연결입니다")
-
     edge_dict = edge.model_dump()
     edge_dict["workspace_id"] = workspace_id
-    edges_collection.insert_one(edge_dict)
+    edge_dict["source"], edge_dict["target"] = edge_endpoints(edge.source, edge.target)
+
+    # 엣지 중복 연결 체크 (같은 workspace 내에서, 방향 무관) - (workspace_id, source, target) unique 인덱스로 보장
+    try:
+        await edges_collection.insert_one(edge_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="이미 존재하는 연결입니다")
+    await bump_workspace_version(workspace_id)
     return edge_dict
 
 
 @router.delete("/{source}/{target}")
-def delete_edge(
+async def delete_edge(
     source: str,
     target: str,
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
+    workspace_id: str = Depends(get_workspace_id),
 ):
     """
     엣지를 삭제
@@ -99,7 +105,7 @@ def delete_edge(
     Args:
         source: 시작 노드(태스크) ID
         target: 끝 노드(태스크) ID
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
     
     Returns:
         dict: 삭제 결과 메시지
@@ -107,13 +113,13 @@ def delete_edge(
     Raises:
         HTTPException: 엣지가 존재하지 않을 때 (404)
     """
-    workspace_id = x_workspace_id
-    
-    result = edges_collection.delete_one({
+    stored_source, stored_target = edge_endpoints(source, target)
+    result = await edges_collection.delete_one({
         "workspace_id": workspace_id,
-        "source": source,
-        "target": target
+        "source": stored_source,
+        "target": stored_target
     })
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="엣지를 찾을 수 없습니다")
+    await bump_workspace_version(workspace_id)
     return {"message": "엣지가 삭제되었습니다", "source": source, "target": target}
@@ -3,167 +3,474 @@
 파일명       : routes/graph.py
 목적         : Graph API 라우터
 설명         :
-    GET    /api/graph              - 그래프 데이터 조회 (tasks + edges + PCA 좌표)
+    GET    /api/graph              - 그래프 데이터 조회 (tasks + edges + PCA 좌표, ETag 지원)
     POST   /api/graph/auto-arrange - 전체 태스크 PCA 재정렬
 ================================================================
 """
 
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import logging
+import time
+from typing import Optional
 import numpy as np
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
-from fastapi import APIRouter, Header
+from cachetools import LRUCache
+from fastapi import APIRouter, Depends, Header, Response
+from fastapi.responses import ORJSONResponse
+from pymongo import ReturnDocument
+from dependencies import get_workspace_id
+from embeddings import HAS_EMBEDDING_FILTER, EMBEDDING_PROJECTION, embedding_matrix
 
 router = APIRouter(prefix="/api/graph", tags=["graph"])
+logger = logging.getLogger(__name__)
 
 tasks_collection = None
 edges_collection = None
+workspaces_collection = None
 
+# 워크스페이스별 PCA 좌표 캐시 (cache-aside, 최대 PCA_CACHE_SIZE개 워크스페이스)
+# { workspace_id: { ids: list[str], coordinates: {task_id: {"x", "y"}}, model: dict | None,
+#                  pca_version: int, fit_version: int, incremental_count: int, expires_at: float } }
+# 좌표는 임베딩이 바뀔 때만 달라지므로 GET 요청에서는 SVD를 다시 계산하지 않음
+# pca_version은 좌표를 계산한 시점의 워크스페이스 좌표 버전 (workspaces.pca_version, 임베딩 변경 시 증가)
+# 여러 워커/파드가 각자 캐시를 가지므로 현재 좌표 버전과 다른 캐시는 미스로 처리함
+# 태스크 생성 시에는 학습된 축(model)으로 새 좌표만 추가하고(extend_pca_cache),
+# 수정된 태스크는 기존 좌표를 교체하며, 추가/교체가 합쳐서 PCA_REFIT_INTERVAL개 쌓이면 다시 학습함
+# 증분 좌표는 이 프로세스에만 있으므로, 축을 학습한 좌표 버전(fit_version)을 ETag에 포함해
+# 같은 좌표 버전이라도 다른 프로세스의 새 학습 결과와 ETag가 겹치지 않게 함
+# 같은 프로세스의 태스크 쓰기 시에는 invalidate_pca_cache()로 바로 무효화됨
+# 만료 시각(expires_at)은 처음 학습할 때 정하며 증분 추가로 항목을 교체해도 늘어나지 않음
+PCA_CACHE_TTL = 60
+PCA_CACHE_SIZE = 256
+PCA_REFIT_INTERVAL = 20
+_pca_cache: LRUCache = LRUCache(maxsize=PCA_CACHE_SIZE)
 
-def set_collections(tasks_col, edges_col):
+# 진행 중인 PCA 좌표 로드 (동시 캐시 미스 병합용, 같은 좌표 버전의 요청끼리만 공유)
+# { workspace_id: (로드를 시작한 좌표 버전, asyncio.Task) }
+_pca_loads: dict[str, tuple[int, asyncio.Task]] = {}
+
+# 커서 배치 크기 (graph, tasks 라우터 공통)
+# - 그래프/목록 조회: 임베딩 없는 작은 문서를 전부 읽으므로 크게 잡아 getMore 왕복을 줄임
+# - 임베딩 포함 조회: 문서가 크므로 작게 잡아 배치당 메모리를 제한
+# - 스트리밍 조회: 첫 배치를 빨리 받아 직렬화/전송과 다음 배치 조회가 겹치도록 중간 크기
+GRAPH_BATCH_SIZE = 5000
+EMBEDDING_BATCH_SIZE = 256
+STREAM_BATCH_SIZE = 500
+
+# 그래프 응답의 태스크 필드 기본값 (저장된 문서에 없는 필드, PCA 좌표가 없는 태스크)
+GRAPH_TASK_DEFAULTS = {
+    "description": None, "priority": "medium", "status": "todo", "category": "general",
+    "tags": [], "due_date": None, "x": 0, "y": 0,
+}
+
+# PCA(SVD) 전용 스레드 풀
+# NumPy의 LAPACK 호출은 GIL을 해제하므로 프로세스 풀 없이도 이벤트 루프를 막지 않으며,
+# 워커 수를 제한해 동시 캐시 미스가 기본 실행기와 CPU를 독점하지 않도록 함
+PCA_MAX_WORKERS = 2
+_pca_executor = ThreadPoolExecutor(max_workers=PCA_MAX_WORKERS, thread_name_prefix="pca")
+
+
+def set_collections(tasks_col, edges_col, workspaces_col):
     """
     MongoDB 컬렉션들을 주입받는 함수.
     
     Args:
         tasks_col: MongoDB tasks 컬렉션 객체
         edges_col: MongoDB edges 컬렉션 객체
+        workspaces_col: MongoDB workspaces 컬렉션 객체 (워크스페이스 버전 저장)
     """
-    global tasks_collection, edges_collection
+    global tasks_collection, edges_collection, workspaces_collection
     tasks_collection = tasks_col
     edges_collection = edges_col
+    workspaces_collection = workspaces_col
+
+
+async def bump_workspace_version(workspace_id: str, coordinates_changed: bool = False) -> tuple[int, int]:
+    """
+    워크스페이스의 데이터 버전을 1 증가시키는 함수
+    (태스크/엣지 쓰기 후 호출, 그래프 ETag 계산에 사용)
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+        coordinates_changed: 임베딩이 바뀌어 PCA 좌표도 달라지면 True (좌표 버전도 함께 증가)
+
+    Returns:
+        tuple: 증가 후의 (데이터 버전, 좌표 버전)
+    """
+    increments = {"version": 1, "pca_version": 1} if coordinates_changed else {"version": 1}
+    doc = await workspaces_collection.find_one_and_update(
+        {"_id": workspace_id},
+        {"$inc": increments},
+        projection={"_id": 0, "version": 1, "pca_version": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc.get("version", 0), doc.get("pca_version", 0)
+
+
+async def get_workspace_versions(workspace_id: str) -> tuple[int, int]:
+    """
+    워크스페이스의 현재 (데이터 버전, 좌표 버전)을 조회하는 함수
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+
+    Returns:
+        tuple: (데이터 버전, 좌표 버전) (쓰기가 한 번도 없었으면 0)
+    """
+    doc = await workspaces_collection.find_one({"_id": workspace_id}, {"_id": 0, "version": 1, "pca_version": 1})
+    if not doc:
+        return 0, 0
+    return doc.get("version", 0), doc.get("pca_version", 0)
+
+
+def workspace_etag(workspace_id: str, version: int, pca_version: int, fit_version: int) -> str:
+    """
+    데이터 버전과 응답 좌표를 계산한 좌표 버전/학습 버전으로 ETag 값을 만드는 함수
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+        version: 응답 데이터를 읽기 전에 조회한 데이터 버전
+        pca_version: 응답 좌표를 계산한 좌표 버전
+        fit_version: 응답 좌표의 PCA 축을 학습한 좌표 버전 (get_pca_coordinates / pca_fit_version)
+
+    Returns:
+        str: 따옴표로 감싼 ETag 값
+    """
+    digest = hashlib.blake2b(
+        f"{workspace_id}:{version}:{pca_version}:{fit_version}".encode(), digest_size=8,
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더 값이 ETag와 일치하는지 확인하는 함수 (weak 비교)"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in if_none_match.split(",")]
+    return etag in candidates or "*" in candidates
+
+
+def invalidate_pca_cache(workspace_id: str):
+    """
+    워크스페이스의 PCA 좌표 캐시를 무효화하는 함수
+    (tasks 라우터의 생성/수정/삭제/동기화 시 호출)
+    진행 중인 로드 결과도 캐시에 저장되지 않도록 함께 제거
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+    """
+    _pca_cache.pop(workspace_id, None)
+    _pca_loads.pop(workspace_id, None)
+
+
+async def _load_embedding_matrix(workspace_id: str) -> tuple[list[str], np.ndarray]:
+    """MongoDB에서 워크스페이스의 임베딩 행렬을 읽어오는 내부 함수"""
+    # 임베딩이 저장된 태스크의 id/임베딩 필드만 조회
+    docs = await tasks_collection.find(
+        {"workspace_id": workspace_id, **HAS_EMBEDDING_FILTER},
+        {"_id": 0, "id": 1, **EMBEDDING_PROJECTION},
+    ).batch_size(EMBEDDING_BATCH_SIZE).to_list(length=None)
+
+    return [doc["id"] for doc in docs], embedding_matrix(docs)
+
+
+async def _load_pca_coordinates(workspace_id: str) -> tuple[list[str], dict[str, dict], Optional[dict]]:
+    """임베딩 행렬을 읽어 PCA 좌표를 계산하는 내부 함수 (CPU 작업은 PCA 전용 스레드에서 실행)"""
+    ids, matrix = await _load_embedding_matrix(workspace_id)
+    loop = asyncio.get_running_loop()
+    coordinates, model = await loop.run_in_executor(_pca_executor, compute_pca_coordinates, ids, matrix)
+    return ids, coordinates, model
+
+
+def _finish_pca_load(workspace_id: str, pca_version: int, load: asyncio.Task):
+    """로드 완료 시 결과를 캐시에 저장하는 내부 콜백 (중간에 무효화되거나 새 로드로 바뀐 경우 저장하지 않음)"""
+    # 버려지는 로드도 예외를 먼저 꺼내 둠 (기다리는 요청이 없으면 "never retrieved" 경고가 남음)
+    error = None if load.cancelled() else load.exception()
+    if _pca_loads.get(workspace_id) != (pca_version, load):
+        if error is not None:
+            logger.warning(f"버려진 PCA 좌표 로드 실패 ({workspace_id}, pca_version={pca_version}): {error!r}")
+        return
+    del _pca_loads[workspace_id]
+
+    if load.cancelled() or error is not None:
+        return
+    ids, coordinates, model = load.result()
+    _pca_cache[workspace_id] = {
+        "ids": ids,
+        "coordinates": coordinates,
+        "model": model,
+        "pca_version": pca_version,
+        "fit_version": pca_version,
+        "incremental_count": 0,
+        "expires_at": time.monotonic() + PCA_CACHE_TTL,
+    }
+
+
+def _current_pca_entry(workspace_id: str, pca_version: int) -> Optional[dict]:
+    """현재 좌표 버전으로 계산된 캐시 항목을 반환하는 내부 함수 (없거나, 만료됐거나, 이전 버전이면 None)"""
+    cached = _pca_cache.get(workspace_id)
+    if cached is None:
+        return None
+    if cached["expires_at"] <= time.monotonic():
+        _pca_cache.pop(workspace_id, None)
+        return None
+    if cached["pca_version"] != pca_version:
+        return None
+    return cached
+
+
+def pca_fit_version(workspace_id: str, pca_version: int) -> int:
+    """
+    get_pca_coordinates가 지금 반환할 좌표의 학습 버전을 계산 없이 구하는 함수 (304 판단용)
+    캐시가 없으면 현재 좌표 버전으로 새로 학습하므로 pca_version과 같음
+    """
+    cached = _current_pca_entry(workspace_id, pca_version)
+    return cached["fit_version"] if cached is not None else pca_version
+
+
+async def get_pca_coordinates(workspace_id: str, pca_version: int) -> tuple[list[str], dict[str, dict], int]:
+    """
+    워크스페이스의 (임베딩이 있는 태스크 ID 목록, PCA 좌표)를 반환하는 함수
+    캐시가 없거나, TTL이 지났거나, 다른 좌표 버전으로 계산된 경우에만 MongoDB에서 다시 읽어 계산하며,
+    동시에 들어온 같은 버전의 캐시 미스 요청들은 하나의 로드 결과를 공유함
+    반환된 dict는 캐시와 공유되므로 호출 측에서 수정하지 말 것
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+        pca_version: 조회 시점의 좌표 버전 (get_workspace_versions)
+
+    Returns:
+        tuple: (임베딩이 있는 태스크 ID 목록, { task_id: {"x", "y"} }, 축을 학습한 좌표 버전)
+               (임베딩 2개 미만이면 좌표는 빈 dict)
+    """
+    cached = _current_pca_entry(workspace_id, pca_version)
+    if cached is not None:
+        return cached["ids"], cached["coordinates"], cached["fit_version"]
+
+    loading = _pca_loads.get(workspace_id)
+    if loading is None or loading[0] != pca_version:
+        load = asyncio.ensure_future(_load_pca_coordinates(workspace_id))
+        _pca_loads[workspace_id] = (pca_version, load)
+        load.add_done_callback(functools.partial(_finish_pca_load, workspace_id, pca_version))
+    else:
+        load = loading[1]
+
+    # 한 요청이 취소되어도 같은 로드를 기다리는 다른 요청에는 영향이 없도록 shield
+    ids, coordinates, _ = await asyncio.shield(load)
+    return ids, coordinates, pca_version
+
+
+def extend_pca_cache(workspace_id: str, embeddings: list[tuple[str, list[float]]], pca_version: int) -> bool:
+    """
+    새로 임베딩이 저장된 태스크들의 좌표를 캐시된 PCA 축으로 변환해 캐시에 반영하는 함수
+    (전체 재학습 O(N·D) 대신 태스크당 O(D), 이미 좌표가 있는 태스크는 추가 대신 교체)
+    바로 이전 좌표 버전의 캐시에 이번 변경만 더한 경우에만 pca_version의 캐시로 갱신함
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+        embeddings: (태스크 ID, 임베딩) 목록 (태스크 ID는 중복 없음, 새 태스크의 임베딩이 없으면 좌표 없이 건너뜀)
+        pca_version: 이번 변경으로 증가한 좌표 버전 (bump_workspace_version의 반환값)
+
+    Returns:
+        bool: 캐시를 그대로 써도 되면 True, 무효화 후 재학습이 필요하면 False
+    """
+    # 캐시가 없거나 로드 중이거나, 다른 프로세스의 변경이 사이에 있었으면 재학습에 맡김
+    cached = _current_pca_entry(workspace_id, pca_version - 1)
+    if cached is None or workspace_id in _pca_loads:
+        return False
+
+    ids, coordinates, model = cached["ids"], cached["coordinates"], cached["model"]
+    incremental_count = cached["incremental_count"]
+    new_ids, new_coordinates = [], {}
+    for task_id, embedding in embeddings:
+        if not embedding:
+            # 기존 태스크의 임베딩이 사라졌으면 좌표에서 빠져야 하므로 재학습
+            if task_id in coordinates:
+                return False
+            continue
+        # 임베딩 2개 미만(기본 좌표 상태)이거나 증분 추가/교체가 많이 쌓였으면 재학습
+        if model is None or incremental_count >= PCA_REFIT_INTERVAL:
+            return False
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != model["mean"].shape:
+            return False
+        x, y = (((vector - model["mean"]) @ model["components"].T - model["center"]) / model["std"] * 40).tolist()
+        if task_id not in coordinates:
+            new_ids.append(task_id)
+        new_coordinates[task_id] = {"x": x, "y": y}
+        incremental_count += 1
+
+    # 반환된 값을 쓰고 있는 요청이 있을 수 있으므로 제자리 수정 대신 새 값으로 교체
+    # (학습 버전과 만료 시각은 그대로 유지)
+    _pca_cache[workspace_id] = {
+        **cached,
+        "ids": [*ids, *new_ids],
+        "coordinates": {**coordinates, **new_coordinates},
+        "pca_version": pca_version,
+        "incremental_count": incremental_count,
+    }
+    return True
+
+
+def has_incremental_coordinates(workspace_id: str) -> bool:
+    """캐시된 좌표 중 재학습 없이 증분 추가/교체된 좌표가 있는지 확인하는 함수"""
+    cached = _pca_cache.get(workspace_id)
+    return cached is not None and cached["expires_at"] > time.monotonic() and cached["incremental_count"] > 0
+
+
+def _pca2(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    float32 SVD로 상위 2개 주성분 좌표를 구하는 내부 함수
+    (sklearn PCA와 동일하게 성분별 최대 절댓값 계수가 양수가 되도록 부호 고정)
+
+    Args:
+        matrix: (N, D) 임베딩 행렬
+
+    Returns:
+        tuple: ((N, 2) 주성분 좌표, (D,) 평균 벡터, (2, D) 주성분 축)
+    """
+    mean = matrix.mean(axis=0)
+    u, s, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+    signs = np.sign(vt[:2, np.argmax(np.abs(vt[:2]), axis=1)].diagonal())
+    signs[signs == 0] = 1
+    return u[:, :2] * (s[:2] * signs), mean, vt[:2] * signs[:, None]
+
+
+def compute_pca_coordinates(ids: list[str], matrix: np.ndarray) -> tuple[dict[str, dict], Optional[dict]]:
+    """
+    임베딩 행렬의 PCA 2D 좌표를 한 번에 계산하는 함수
+    (get_pca_coordinates에서 사용)
+    CPU 작업이므로 이벤트 루프를 막지 않도록 PCA 전용 스레드 풀에서 호출할 것
+
+    Args:
+        ids: 행렬의 각 행에 대응하는 태스크 ID 목록
+        matrix: (N, D) 임베딩 행렬
+
+    Returns:
+        tuple: ({ task_id: {"x": float, "y": float} }, 증분 변환용 model)
+               (임베딩 2개 미만이면 빈 dict와 None)
+    """
+    if len(ids) < 2:
+        return {}, None
+
+    coords_2d, mean, components = _pca2(matrix)
+
+    # 축별 표준화(StandardScaler와 동일, 분산 0인 축은 그대로) 후 스케일링
+    center = coords_2d.mean(axis=0)
+    std = coords_2d.std(axis=0)
+    std[std == 0] = 1
+    coords_2d = (coords_2d - center) / std * 40
+
+    model = {
+        "mean": mean,
+        "components": components,
+        "center": center,
+        "std": std,
+    }
+    # 행 단위 인덱싱 대신 tolist()로 한 번에 변환
+    coordinates = {
+        task_id: {"x": x, "y": y}
+        for task_id, (x, y) in zip(ids, coords_2d.tolist())
+    }
+    return coordinates, model
 
 
 @router.get("/")
-def get_graph(x_workspace_id: str = Header(..., alias="X-Workspace-ID")):
+async def get_graph(
+    workspace_id: str = Depends(get_workspace_id),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     그래프 데이터 통합 (tasks + edges)
     PCA로 계산된 2D 좌표 포함
+    데이터가 바뀌지 않았으면 (If-None-Match == ETag) 304 응답
 
     Args:
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
+        if_none_match: 클라이언트가 가진 ETag (헤더, 선택)
 
     Returns:
-        dict: { tasks: [...], edges: [...] }
+        dict: { tasks: [...], edges: [...] } (ETag 헤더 포함)
     """
-    workspace_id = x_workspace_id
+    # 조회 전에 버전을 읽어 두어, 조회 중 변경이 생겨도 다음 요청에서 다시 받도록 함
+    # (좌표는 같은 좌표 버전으로 계산된 것만 사용하므로 ETag와 응답 좌표가 항상 일치)
+    version, pca_version = await get_workspace_versions(workspace_id)
+    etag = workspace_etag(workspace_id, version, pca_version, pca_fit_version(workspace_id, pca_version))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
     
-    # Tasks 조회 (해당 워크스페이스만)
-    tasks = list(tasks_collection.find({"workspace_id": workspace_id}))
-
-    # 임베딩이 있는 테스크들로 PCA 계산
-    embeddings = []
-    tasks_with_embedding = []
-
-    for task in tasks:
-        embedding = task.get("embedding", [])
-        if embedding:
-            embeddings.append(embedding)
-            tasks_with_embedding.append(task)
-    
-    # PCA로 2D 좌표 계산
-    coordinates = {}
-    if len(embeddings) >= 2:
-        pca = PCA(n_components=2)
-        coords_2d = pca.fit_transform(np.array(embeddings))
-
-        # StandardScaler로 정규화 후 스케일링
-        scaler = StandardScaler()
-        coords_2d = scaler.fit_transform(coords_2d) * 40
-
-        for i, task in enumerate(tasks_with_embedding):
-            coordinates[task.get("id")] = {
-                "x": float(coords_2d[i][0]),
-                "y": float(coords_2d[i][1])
-            }
-
-    # Tasks 결과 생성
-    tasks_result = []
-    for task in tasks:
-        task_id = task.get("id")
-        coord = coordinates.get(task_id, {"x": 0, "y": 0})
-
-        tasks_result.append({
-            "id": task_id,
-            "title": task.get("title"),
-            "description": task.get("description"),
-            "priority": task.get("priority", "medium"),
-            "status": task.get("status", "todo"),
-            "category": task.get("category", "general"),
-            "tags": task.get("tags", []),
-            "due_date": task.get("due_date"),
-            "x": coord["x"],
-            "y": coord["y"],
-        })
-    
-    # Edges 조회 (해당 워크스페이스만)
-    edges = list(edges_collection.find({"workspace_id": workspace_id}))
-    edges_result = []
-    for edge in edges:
-        edges_result.append({
-            "source": edge.get("source"),
-            "target": edge.get("target"),
-            "weight": edge.get("weight", 0.5),
-        })
+    # Tasks / Edges / PCA 좌표 동시 조회 (해당 워크스페이스만, 응답에 필요한 필드만 projection)
+    task_projection = {
+        "_id": 0, "id": 1, "title": 1, "description": 1, "priority": 1,
+        "status": 1, "category": 1, "tags": 1, "due_date": 1,
+    }
+    edge_projection = {"_id": 0, "source": 1, "target": 1, "weight": 1}
+    tasks, edges, (_, coordinates, fit_version) = await asyncio.gather(
+        tasks_collection.find({"workspace_id": workspace_id}, task_projection)
+        .batch_size(GRAPH_BATCH_SIZE).to_list(length=None),
+        edges_collection.find({"workspace_id": workspace_id}, edge_projection)
+        .batch_size(GRAPH_BATCH_SIZE).to_list(length=None),
+        get_pca_coordinates(workspace_id, pca_version),
+    )
+
+    # Tasks 결과 생성 (response_model 없이 직접 직렬화하므로 기본값 → 문서 → 좌표 순으로 병합)
+    tasks_result = [
+        {**GRAPH_TASK_DEFAULTS, **task, **coordinates.get(task["id"], {})}
+        for task in tasks
+    ]
 
-    return {"tasks": tasks_result, "edges": edges_result}
+    # Edges는 projection 결과를 그대로 사용 (모든 엣지 쓰기 경로가 weight를 저장함)
+    # ETag는 실제로 사용한 좌표의 학습 버전으로 다시 계산 (조회 중 캐시가 바뀌었을 수 있음)
+    etag = workspace_etag(workspace_id, version, pca_version, fit_version)
+    return ORJSONResponse(
+        {"tasks": tasks_result, "edges": edges},
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
 
 
 @router.post("/auto-arrange")
-def auto_arrange(x_workspace_id: str = Header(..., alias="X-Workspace-ID")):
+async def auto_arrange(workspace_id: str = Depends(get_workspace_id)):
     """
     전체 태스크를 PCA로 재정렬하여 좌표 반환
     
     Args:
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
 
     Returns:
         dict: { positions: [{ id, x, y }, ...] }
     """
-    workspace_id = x_workspace_id
-    
-    tasks = list(tasks_collection.find({"workspace_id": workspace_id}))
-    
-    embeddings = []
-    tasks_with_embedding = []
-    
-    for task in tasks:
-        embedding = task.get("embedding", [])
-        if embedding:
-            embeddings.append(embedding)
-            tasks_with_embedding.append(task)
-    
-    positions = []
+    # 증분 추가된 좌표가 있으면 전체를 다시 학습 (자동 정렬은 항상 전체 기준 배치)
+    # 그래프 좌표도 바뀌므로 버전을 올려 ETag를 갱신
+    if has_incremental_coordinates(workspace_id):
+        invalidate_pca_cache(workspace_id)
+        _, pca_version = await bump_workspace_version(workspace_id, coordinates_changed=True)
+    else:
+        _, pca_version = await get_workspace_versions(workspace_id)
+
+    tasks, (embedded_ids, coordinates, _) = await asyncio.gather(
+        tasks_collection.find({"workspace_id": workspace_id}, {"_id": 0, "id": 1})
+        .batch_size(GRAPH_BATCH_SIZE).to_list(length=None),
+        get_pca_coordinates(workspace_id, pca_version),
+    )
     
-    if len(embeddings) >= 2:
-        pca = PCA(n_components=2)
-        coords_2d = pca.fit_transform(np.array(embeddings))
-        
-        # StandardScaler로 정규화 후 스케일링
-        scaler = StandardScaler()
-        coords_2d = scaler.fit_transform(coords_2d) * 40
-        
-        for i, task in enumerate(tasks_with_embedding):
-            positions.append({
-                "id": task.get("id"),
-                "x": float(coords_2d[i][0]),
-                "y": float(coords_2d[i][1])
-            })
+    if coordinates:
+        positions = [{"id": task_id, **coordinates[task_id]} for task_id in embedded_ids]
     else:
         # 임베딩 2개 미만이면 기본 좌표
-        for i, task in enumerate(tasks_with_embedding):
-            positions.append({
-                "id": task.get("id"),
-                "x": float(i * 100),
-                "y": 0.0
-            })
+        positions = [
+            {"id": task_id, "x": float(i * 100), "y": 0.0}
+            for i, task_id in enumerate(embedded_ids)
+        ]
     
-    # 임베딩 없는 태스크는 (0, 0)
-    embedded_ids = {t.get("id") for t in tasks_with_embedding}
-    for task in tasks:
-        if task.get("id") not in embedded_ids:
-            positions.append({
-                "id": task.get("id"),
-                "x": 0.0,
-                "y": 0.0
-            })
+    # 임베딩 없는 태스크는 (0, 0) - 전체 ID와 임베딩 ID의 차집합 (조회 순서 유지)
+    embedded_id_set = set(embedded_ids)
+    positions.extend(
+        {"id": task_id, "x": 0.0, "y": 0.0}
+        for task_id in (task["id"] for task in tasks)
+        if task_id not in embedded_id_set
+    )
     
     return {"positions": positions}
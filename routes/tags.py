@@ -8,16 +8,36 @@
 ================================================================
 """
 
-import os
-from google import genai
-from fastapi import APIRouter, HTTPException, Header
+import asyncio
+import re
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from dependencies import get_workspace_id
 
 router = APIRouter(prefix="/api/tags", tags=["tags"])
 
 tasks_collection = None
 gemini_client = None
 
+# 태그 추천에 사용하는 Gemini 모델
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# 동시에 진행할 수 있는 LLM 호출 수 (초과 요청은 대기, API 쿼터 보호)
+LLM_CONCURRENCY = 8
+_llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# LLM 응답의 태그 구분자 (쉼표/줄바꿈 + 뒤따르는 공백)
+_TAG_SPLIT = re.compile(r"\s*[,\n]\s*")
+
+# 워크스페이스별 태그 목록 캐시 (cache-aside, 최대 TAGS_CACHE_SIZE개 워크스페이스)
+# { workspace_id: list[str] }
+# 태스크 쓰기 시 invalidate_tags_cache()로 무효화되며,
+# 다른 워커 프로세스의 변경은 TTL이 지나면 반영됨
+TAGS_CACHE_TTL = 60
+TAGS_CACHE_SIZE = 1024
+_tags_cache: TTLCache = TTLCache(maxsize=TAGS_CACHE_SIZE, ttl=TAGS_CACHE_TTL)
+
 
 def set_collection(collection):
     """
@@ -41,51 +61,64 @@ def set_gemini_client(client):
     gemini_client = client
 
 
+def invalidate_tags_cache(workspace_id: str):
+    """
+    워크스페이스의 태그 목록 캐시를 무효화하는 함수
+    (tasks 라우터의 생성/수정/삭제/동기화 시 호출)
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+    """
+    _tags_cache.pop(workspace_id, None)
+
+
 class TagSuggestionRequest(BaseModel):
     """태그 추천 요청 모델"""
     title: str
     description: str = ""
 
 
-def _get_tags_for_workspace(workspace_id: str) -> list[str]:
+async def _get_tags_for_workspace(workspace_id: str) -> list[str]:
     """
     해당 워크스페이스의 모든 태그 목록을 조회하는 내부 함수
+    캐시가 없거나 TTL이 지났을 때만 집계를 다시 실행
     """
-    pipeline = [
-        {"$match": {"workspace_id": workspace_id}},
-        {"$unwind": "$tags"},
-        {"$group": {"_id": "$tags"}},
-        {"$sort": {"_id": 1}},
-    ]
-    result = tasks_collection.aggregate(pipeline)
-    return [doc["_id"] for doc in result]
+    tags = _tags_cache.get(workspace_id)
+    if tags is not None:
+        return tags
+
+    # (workspace_id, tags) 인덱스를 사용하는 distinct로 unique 태그 추출
+    tags = sorted(await tasks_collection.distinct("tags", {"workspace_id": workspace_id}))
+
+    _tags_cache[workspace_id] = tags
+    return tags
 
 
 @router.get("/")
-def get_tags(x_workspace_id: str = Header(..., alias="X-Workspace-ID")):
+async def get_tags(workspace_id: str = Depends(get_workspace_id)):
     """
     전체 태그 목록 조회 (해당 워크스페이스의 모든 테스크에서 unique 태그 추출)
 
     Args:
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
 
     Returns:
         list[str]: 정렬된 태그 목록
     """
-    return _get_tags_for_workspace(x_workspace_id)
+    return await _get_tags_for_workspace(workspace_id)
 
 
 @router.post("/suggest-tags")
 async def suggest_tags(
     request: TagSuggestionRequest,
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
+    workspace_id: str = Depends(get_workspace_id),
 ):
     """
     LLM을 이용한 태그 추천
 
     Args:
         request: 테스크 제목과 설명
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
     
     Returns:
         dict: 추천 태그 목록
@@ -94,7 +127,7 @@ async def suggest_tags(
         raise HTTPException(status_code=500, detail="Gemini API 키가 설정되지 않았습니다")
 
     # 기존 태그 목록 가져오기 (해당 워크스페이스)
-    existing_tags = _get_tags_for_workspace(x_workspace_id)
+    existing_tags = await _get_tags_for_workspace(workspace_id)
 
     # 프롬프트 생성
     prompt = f"""당신은 할 일(Task) 관리 앱의 태그 추천 시스템입니다.
@@ -115,15 +148,15 @@ async def suggest_tags(
 예시 출력: 업무, 회의, 중요"""
     
     try:
-        response = gemini_client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
+        # 비동기 API 사용 (이벤트 루프 블로킹 방지), 동시 호출 수 제한
+        async with _llm_semaphore:
+            response = await gemini_client.aio.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=prompt
+            )
         
-        # 응답 파싱
-        tags_text = response.text.strip()
-        tags = [tag.strip() for tag in tags_text.split(",")]
-        tags = [tag for tag in tags if tag]  # 빈 태그 제거
+        # 응답 파싱 (분리 + 공백 제거를 한 번에, 빈 태그 제거)
+        tags = [tag for tag in _TAG_SPLIT.split(response.text.strip()) if tag]
 
         return {"tags": tags}
     except Exception as e:
@@ -4,6 +4,7 @@
 목적         : Tasks API 라우터
 설명         :
     GET    /api/tasks              - 전체 태스크 조회
+    GET    /api/tasks/stream       - 전체 태스크 조회 (NDJSON 스트리밍)
     GET    /api/tasks/{id}         - 특정 태스크 조회
     POST   /api/tasks              - 새 태스크 생성
     POST   /api/tasks/sync         - 오프라인 동기화 (bulk upsert)
@@ -13,15 +14,32 @@
 ================================================================
 """
 
+import asyncio
 from typing import Optional
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Header
-from models import TaskCreate, TaskUpdate, TaskResponse, SyncRequest, SyncResponse, TaskSync, EdgeResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from dependencies import get_workspace_id
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from embeddings import (
+    EXCLUDE_EMBEDDING_PROJECTION,
+    embedding_text, embedding_key, quantize_embedding, decode_embedding,
+)
+from models import TaskCreate, TaskUpdate, TaskListResponse, TaskResponse, SyncRequest, SyncResponse, TaskSync, EdgeResponse
+from routes.graph import (
+    GRAPH_BATCH_SIZE, EMBEDDING_BATCH_SIZE, STREAM_BATCH_SIZE,
+    get_pca_coordinates, extend_pca_cache, invalidate_pca_cache, bump_workspace_version,
+    get_workspace_versions, workspace_etag, etag_matches, pca_fit_version,
+)
+from routes.edges import edge_endpoints
+from routes.tags import invalidate_tags_cache
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
 tasks_collection = None
 edges_collection = None
+get_embeddings = None  # main.get_embeddings (set_embedding_function으로 주입)
 
 
 def set_collections(tasks_col, edges_col):
@@ -37,58 +55,250 @@ def set_collections(tasks_col, edges_col):
     edges_collection = edges_col
 
 
+def set_embedding_function(embed):
+    """
+    임베딩 생성 함수를 주입받는 함수.
+    (main을 요청마다 import하지 않고, 순환 import도 피하기 위함)
+    
+    Args:
+        embed: 텍스트 목록을 임베딩 목록으로 변환하는 async 함수 (main.get_embeddings)
+    """
+    global get_embeddings
+    get_embeddings = embed
+
+
+async def _mark_workspace_changed(workspace_id: str, keep_pca_cache: bool = False):
+    """
+    태스크 변경 후 워크스페이스의 파생 캐시(PCA 좌표, 태그 목록)를 무효화하고
+    데이터 버전(그래프 ETag)을 올리는 내부 함수
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+        keep_pca_cache: 임베딩 변화가 없거나 이미 캐시에 반영했으면 True
+    """
+    if not keep_pca_cache:
+        invalidate_pca_cache(workspace_id)
+    invalidate_tags_cache(workspace_id)
+    await bump_workspace_version(workspace_id, coordinates_changed=not keep_pca_cache)
+
+
+def _embedding_fields(embedding: list[float], key: str) -> dict:
+    """
+    태스크 문서에 저장할 임베딩 필드를 만드는 내부 함수
+    (int8 양자화 + 입력 텍스트 해시, 생성에 실패했으면 해시를 비워 다음에 다시 생성)
+
+    Args:
+        embedding: 생성된 임베딩 (실패 시 빈 리스트)
+        key: 임베딩 입력 텍스트의 해시
+
+    Returns:
+        dict: { embedding_q, embedding_scale, embedding_key, embedding_pending }
+    """
+    return {**quantize_embedding(embedding), "embedding_key": key if embedding else None, "embedding_pending": False}
+
+
+def _pending_embedding_fields(key: str) -> dict:
+    """백그라운드 임베딩 생성 대기 상태로 저장할 필드 (입력 해시는 _store_embeddings의 갱신 조건으로 사용)"""
+    return {"embedding_key": key, "embedding_pending": True}
+
+
+async def _store_embeddings(workspace_id: str, jobs: list[tuple[str, str, str]]):
+    """
+    응답 후 백그라운드에서 임베딩을 일괄 생성해 저장하는 내부 함수
+    (create_task / sync_tasks가 embedding_pending=True로 저장한 태스크 대상)
+    그 사이 내용이 다시 바뀌어 입력 해시가 달라졌거나 삭제된 태스크는 건너뜀
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+        jobs: (태스크 ID, 임베딩 입력 텍스트, 입력 해시) 목록
+    """
+    vectors = await get_embeddings([text for _, text, _ in jobs])
+    
+    operations = [
+        UpdateOne(
+            {"id": task_id, "workspace_id": workspace_id, "embedding_key": key, "embedding_pending": True},
+            {"$set": _embedding_fields(embedding, key), "$unset": {"embedding": ""}},
+        )
+        for (task_id, _, key), embedding in zip(jobs, vectors)
+    ]
+    result = await _bulk_write(tasks_collection, operations, ordered=False)
+    if not result["nMatched"]:
+        return
+    
+    # 좌표 버전을 올린 뒤, 모든 태스크가 반영됐으면 기존 PCA 축으로 새 좌표만 추가
+    # (불가능하면 캐시 무효화 후 다음 조회에서 재학습)
+    _, pca_version = await bump_workspace_version(workspace_id, coordinates_changed=True)
+    pca_extended = result["nMatched"] == len(jobs) and extend_pca_cache(
+        workspace_id,
+        [(task_id, embedding) for (task_id, _, _), embedding in zip(jobs, vectors)],
+        pca_version,
+    )
+    if not pca_extended:
+        invalidate_pca_cache(workspace_id)
+
+
+def _has_repeated_keys(keys) -> bool:
+    """같은 대상(태스크 ID, 엣지 쌍)이 두 번 이상 나오는지 확인하는 내부 함수"""
+    keys = list(keys)
+    return len(set(keys)) != len(keys)
+
+
+async def _bulk_write(collection, operations: list, ordered: bool) -> dict:
+    """
+    bulk_write를 실행하고 처리 건수를 반환하는 내부 함수
+    동시 요청으로 이미 생성된 문서(중복 키) 오류는 무시
+    (ordered이면 MongoDB가 첫 오류에서 멈추므로 오류 다음 작업부터 다시 실행)
+
+    Args:
+        collection: MongoDB 컬렉션 객체
+        operations: InsertOne/UpdateOne/DeleteOne 작업 목록
+        ordered: 같은 문서에 대한 작업이 여러 개면 True (요청 순서대로 실행)
+
+    Returns:
+        dict: { nInserted, nUpserted, nMatched, nModified, nRemoved } 처리 건수
+    """
+    totals = dict.fromkeys(("nInserted", "nUpserted", "nMatched", "nModified", "nRemoved"), 0)
+    while operations:
+        try:
+            details = (await collection.bulk_write(operations, ordered=ordered)).bulk_api_result
+            remaining = []
+        except BulkWriteError as e:
+            details = e.details
+            errors = details.get("writeErrors", [])
+            if any(error["code"] != 11000 for error in errors):
+                raise
+            remaining = operations[errors[-1]["index"] + 1:] if ordered else []
+        for name in totals:
+            totals[name] += details.get(name, 0)
+        operations = remaining
+    return totals
+
+
+async def _link_tasks_by_tags(workspace_id: str, task_id: str, tags: list[str]):
+    """
+    동일한 태그를 가진 기존 태스크들과 엣지를 자동 연결하는 내부 함수
+    후보/공통 태그 수 집계 1회 + 조건부 upsert 일괄 실행 1회로 처리
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자
+        task_id: 새로 생성된 태스크 ID
+        tags: 새로 생성된 태스크의 태그 목록
+    """
+    if not tags:
+        return
+    
+    # 동일 태그를 가진 기존 태스크와 공통 태그 수를 서버에서 집계 (같은 워크스페이스 내에서)
+    # 태그 목록 대신 개수만 전송받음
+    candidates = await tasks_collection.aggregate([
+        {"$match": {
+            "workspace_id": workspace_id,
+            "id": {"$ne": task_id},  # 자기 자신 제외
+            "tags": {"$in": tags}  # 태그 중 하나라도 일치
+        }},
+        {"$project": {
+            "_id": 0,
+            "id": 1,
+            "common": {"$size": {"$setIntersection": ["$tags", {"$literal": tags}]}},
+            "tag_count": {"$size": "$tags"},
+        }},
+    ]).to_list(length=None)
+    if not candidates:
+        return
+    
+    # 공통 태그 수에 따라 weight 계산 (0.0 ~ 1.0)
+    own_len = len(tags)
+    operations = []
+    for candidate in candidates:
+        weight = candidate["common"] / max(own_len, candidate["tag_count"])
+        
+        # 이미 연결되어 있으면 아무것도 하지 않고, 없을 때만 삽입 (필터의 필드가 그대로 문서에 저장됨)
+        source, target = edge_endpoints(task_id, candidate["id"])
+        operations.append(UpdateOne(
+            {"workspace_id": workspace_id, "source": source, "target": target},
+            {"$setOnInsert": {"weight": round(weight, 2)}},
+            upsert=True
+        ))
+    
+    # 동시 요청으로 이미 생성된 엣지(중복 키)는 무시
+    await _bulk_write(edges_collection, operations, ordered=False)
+
+
 @router.get("/", response_model=list[TaskResponse])
-def get_all_tasks(
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
-    tag: Optional[str] = None
+async def get_all_tasks(
+    workspace_id: str = Depends(get_workspace_id),
+    tag: Optional[str] = None,
+    include_embedding: bool = False
 ):
     """
     전체 태스크 목록을 조회합니다.
 
     Args:
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
         tag: 필터링할 태그(선택)
+        include_embedding: 임베딩 포함 여부 (기본값 False, 제외 시 빈 리스트)
     
     Returns:
         list[TaskResponse]: 모든 태스크 목록
     """
-    workspace_id = x_workspace_id
-    
     # 태그 필터링
     query = {"workspace_id": workspace_id}
     if tag:
         query["tags"] = tag
 
-    tasks = list(tasks_collection.find(query))
-    result = []
-    for task in tasks:
-        task_dict = {
-            "workspace_id": task.get("workspace_id"),
-            "id": task.get("id"),
-            "title": task.get("title"),
-            "description": task.get("description"),
-            "priority": task.get("priority", "medium"),
-            "status": task.get("status", "todo"),
-            "category": task.get("category", "general"),
-            "tags": task.get("tags", []),
-            "embedding": task.get("embedding", []),
-            "due_date": task.get("due_date"),
-        }
-        result.append(task_dict)
-    return result
+    # 임베딩은 문서 크기의 대부분을 차지하므로 요청 시에만 조회
+    # (전체 결과를 항상 끝까지 읽으므로 문서 크기에 맞춰 커서 배치 크기 지정)
+    if include_embedding:
+        projection, batch_size = {"_id": 0}, EMBEDDING_BATCH_SIZE
+    else:
+        projection, batch_size = EXCLUDE_EMBEDDING_PROJECTION, GRAPH_BATCH_SIZE
+    tasks = await tasks_collection.find(query, projection).batch_size(batch_size).to_list(length=None)
+    # 조회 결과를 그대로 반환 (없는 필드의 기본값은 response_model이 채움)
+    if include_embedding:
+        for task in tasks:
+            task["embedding"] = decode_embedding(task)
+    return tasks
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_tasks(
+    workspace_id: str = Depends(get_workspace_id),
+    tag: Optional[str] = None,
+):
+    """
+    전체 태스크 목록을 NDJSON(한 줄에 태스크 하나)으로 스트리밍합니다.
+    전체 결과를 메모리에 모으지 않고 커서 배치 단위로 직렬화하여 전송 (큰 워크스페이스용, 임베딩 제외)
+
+    Args:
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
+        tag: 필터링할 태그(선택)
+    
+    Returns:
+        StreamingResponse: application/x-ndjson 형식의 TaskListResponse 목록
+    """
+    query = {"workspace_id": workspace_id}
+    if tag:
+        query["tags"] = tag
+    cursor = tasks_collection.find(query, EXCLUDE_EMBEDDING_PROJECTION).batch_size(STREAM_BATCH_SIZE)
+
+    async def ndjson_lines():
+        # 목록 API와 같은 필드/기본값이 되도록 응답 모델로 직렬화
+        async for task in cursor:
+            yield TaskListResponse.model_validate(task).model_dump_json().encode() + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task(
+async def get_task(
     task_id: str,
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
+    workspace_id: str = Depends(get_workspace_id),
 ):
     """
     특정 태스크를 조회합니다.
     
     Args:
         task_id: 조회할 태스크의 ID
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
         
     Returns:
         TaskResponse: 태스크 정보
@@ -96,37 +306,28 @@ def get_task(
     Raises:
         HTTPException: 태스크가 존재하지 않을 때 (404)
     """
-    workspace_id = x_workspace_id
-    
-    task = tasks_collection.find_one({"id": task_id, "workspace_id": workspace_id})
+    task = await tasks_collection.find_one({"id": task_id, "workspace_id": workspace_id}, {"_id": 0})
     if not task:
         raise HTTPException(status_code=404, detail="태스크를 찾을 수 없습니다")
-    return {
-        "workspace_id": task.get("workspace_id"),
-        "id": task.get("id"),
-        "title": task.get("title"),
-        "description": task.get("description"),
-        "priority": task.get("priority", "medium"),
-        "status": task.get("status", "todo"),
-        "category": task.get("category", "general"),
-        "tags": task.get("tags", []),
-        "embedding": task.get("embedding", []),
-        "due_date": task.get("due_date"),
-    }
+    task["embedding"] = decode_embedding(task)
+    return task
 
 
 @router.post("/", response_model=TaskResponse)
-def create_task(
+async def create_task(
     task: TaskCreate,
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
+    background_tasks: BackgroundTasks,
+    workspace_id: str = Depends(get_workspace_id),
 ):
     """
     새 태스크를 생성합니다.
     동일한 태그를 가진 기존 태스크들과 엣지를 자동 연결합니다.
+    임베딩은 응답 후 백그라운드에서 생성하므로 응답의 embedding은 비어 있고 embedding_pending=True입니다.
     
     Args:
         task: 생성할 태스크 정보
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        background_tasks: 임베딩 생성 작업을 등록할 백그라운드 작업 목록
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
         
     Returns:
         TaskResponse: 생성된 태스크 정보
@@ -134,60 +335,34 @@ def create_task(
     Raises:
         HTTPException: 이미 존재하는 ID일 때 (400)
     """
-    workspace_id = x_workspace_id
-    
-    if tasks_collection.find_one({"id": task.id, "workspace_id": workspace_id}):
-        raise HTTPException(status_code=400, detail="이미 존재하는 ID입니다")
-    
     task_dict = task.model_dump()
     task_dict["workspace_id"] = workspace_id
 
-    # 임베딩 생성 (제목 + 설명 + 태그)
-    text_for_embedding = f"{task.title} {task.description or ''} {' '.join(task.tags)}"
-    from main import get_embedding
-    task_dict["embedding"] = get_embedding(text_for_embedding)
-    
-    tasks_collection.insert_one(task_dict)
+    # 임베딩 (제목 + 설명 + 태그)은 응답 후 생성, 그 전까지는 입력 해시와 대기 상태만 저장
+    text_for_embedding = embedding_text(task.title, task.description, task.tags)
+    key = embedding_key(text_for_embedding)
+    task_dict.update(_pending_embedding_fields(key))
+    
+    # 중복 ID는 사전 조회 없이 (workspace_id, id) unique 인덱스로 판별
+    try:
+        await tasks_collection.insert_one(task_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="이미 존재하는 ID입니다")
     
     # 태그 기반 엣지 자동 연결
-    if task.tags:
-        # 동일 태그를 가진 기존 태스크 찾기 (같은 워크스페이스 내에서)
-        existing_tasks = tasks_collection.find({
-            "workspace_id": workspace_id,
-            "id": {"$ne": task.id},  # 자기 자신 제외
-            "tags": {"$in": task.tags}  # 태그 중 하나라도 일치
-        })
-        
-        for existing_task in existing_tasks:
-            # 공통 태그 수에 따라 weight 계산 (0.0 ~ 1.0)
-            common_tags = set(task.tags) & set(existing_task.get("tags", []))
-            weight = len(common_tags) / max(len(task.tags), len(existing_task.get("tags", [])))
-            
-            # 엣지 생성 (중복 방지 - 같은 워크스페이스 내에서)
-            edge_exists = edges_collection.find_one({
-                "workspace_id": workspace_id,
-                "$or": [
-                    {"source": task.id, "target": existing_task["id"]},
-                    {"source": existing_task["id"], "target": task.id}
-                ]
-            })
-            
-            if not edge_exists:
-                edges_collection.insert_one({
-                    "workspace_id": workspace_id,
-                    "source": task.id,
-                    "target": existing_task["id"],
-                    "weight": round(weight, 2)
-                })
+    await _link_tasks_by_tags(workspace_id, task.id, task.tags)
     
+    # 임베딩이 아직 없으므로 PCA 좌표는 그대로 유효 (임베딩 저장 후 좌표 추가)
+    await _mark_workspace_changed(workspace_id, keep_pca_cache=True)
+    background_tasks.add_task(_store_embeddings, workspace_id, [(task.id, text_for_embedding, key)])
     return task_dict
 
 
 @router.patch("/{task_id}", response_model=TaskResponse)
-def update_task(
+async def update_task(
     task_id: str,
     task_update: TaskUpdate,
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
+    workspace_id: str = Depends(get_workspace_id),
 ):
     """
     태스크를 부분 수정합니다.
@@ -195,7 +370,7 @@ def update_task(
     Args:
         task_id: 수정할 태스크의 ID
         task_update: 수정할 필드들 (None이 아닌 필드만 적용)
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
         
     Returns:
         TaskResponse: 수정된 태스크 정보
@@ -203,44 +378,41 @@ def update_task(
     Raises:
         HTTPException: 태스크가 존재하지 않을 때 (404)
     """
-    workspace_id = x_workspace_id
-    
-    existing = tasks_collection.find_one({"id": task_id, "workspace_id": workspace_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="태스크를 찾을 수 없습니다")
+    task_filter = {"id": task_id, "workspace_id": workspace_id}
     
-    # None이 아닌 필드만 업데이트
+    # None이 아닌 필드만 업데이트 (수정 + 수정 후 문서 조회를 한 번에, 바꿀 필드가 없으면 조회만)
     update_data = {k: v for k, v in task_update.model_dump().items() if v is not None}
-
     if update_data:
-        tasks_collection.update_one({"id": task_id, "workspace_id": workspace_id}, {"$set": update_data})
+        updated = await tasks_collection.find_one_and_update(
+            task_filter,
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+    else:
+        updated = await tasks_collection.find_one(task_filter, {"_id": 0})
+    
+    if not updated:
+        raise HTTPException(status_code=404, detail="태스크를 찾을 수 없습니다")
+    if update_data:
+        # 수정 시에는 임베딩을 다시 만들지 않으므로 PCA 좌표는 그대로 유효
+        await _mark_workspace_changed(workspace_id, keep_pca_cache=True)
     
-    updated = tasks_collection.find_one({"id": task_id, "workspace_id": workspace_id})
-    return {
-        "workspace_id": updated.get("workspace_id"),
-        "id": updated.get("id"),
-        "title": updated.get("title"),
-        "description": updated.get("description"),
-        "priority": updated.get("priority", "medium"),
-        "status": updated.get("status", "todo"),
-        "category": updated.get("category", "general"),
-        "tags": updated.get("tags", []),
-        "embedding": updated.get("embedding", []),
-        "due_date": updated.get("due_date"),
-    }
+    updated["embedding"] = decode_embedding(updated)
+    return updated
 
 
 @router.delete("/{task_id}")
-def delete_task(
+async def delete_task(
     task_id: str,
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
+    workspace_id: str = Depends(get_workspace_id),
 ):
     """
     태스크를 삭제합니다.
     
     Args:
         task_id: 삭제할 태스크의 ID
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
         
     Returns:
         dict: 삭제 결과 메시지
@@ -248,25 +420,24 @@ def delete_task(
     Raises:
         HTTPException: 태스크가 존재하지 않을 때 (404)
     """
-    workspace_id = x_workspace_id
-    
-    result = tasks_collection.delete_one({"id": task_id, "workspace_id": workspace_id})
+    result = await tasks_collection.delete_one({"id": task_id, "workspace_id": workspace_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="태스크를 찾을 수 없습니다")
+    await _mark_workspace_changed(workspace_id)
     return {"message": "태스크가 삭제되었습니다", "id": task_id}
 
 
 @router.delete("/{task_id}/cascade")
-def delete_task_cascade(
+async def delete_task_cascade(
     task_id: str,
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
+    workspace_id: str = Depends(get_workspace_id),
 ):
     """
     태스크와 연결된 엣지를 함께 삭제합니다.
     
     Args:
         task_id: 삭제할 태스크의 ID
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
         
     Returns:
         dict: 삭제 결과 (삭제된 태스크, 엣지 수)
@@ -274,24 +445,24 @@ def delete_task_cascade(
     Raises:
         HTTPException: 태스크가 존재하지 않을 때 (404)
     """
-    workspace_id = x_workspace_id
-    
-    # 태스크 존재 확인
-    task = tasks_collection.find_one({"id": task_id, "workspace_id": workspace_id})
-    if not task:
+    # 태스크 삭제(deleted_count로 존재 확인)와 연결된 엣지 삭제를 동시에 수행
+    # (같은 워크스페이스 내에서 source 또는 target이 해당 태스크인 엣지)
+    task_result, edge_result = await asyncio.gather(
+        tasks_collection.delete_one({"id": task_id, "workspace_id": workspace_id}),
+        edges_collection.delete_many({
+            "workspace_id": workspace_id,
+            "$or": [
+                {"source": task_id},
+                {"target": task_id}
+            ]
+        }),
+    )
+    if task_result.deleted_count == 0:
+        # 태스크가 없어도 남아 있던 고아 엣지가 지워졌다면 변경으로 처리
+        if edge_result.deleted_count:
+            await _mark_workspace_changed(workspace_id)
         raise HTTPException(status_code=404, detail="태스크를 찾을 수 없습니다")
-    
-    # 연결된 엣지 삭제 (같은 워크스페이스 내에서 source 또는 target이 해당 태스크인 경우)
-    edge_result = edges_collection.delete_many({
-        "workspace_id": workspace_id,
-        "$or": [
-            {"source": task_id},
-            {"target": task_id}
-        ]
-    })
-    
-    # 태스크 삭제
-    tasks_collection.delete_one({"id": task_id, "workspace_id": workspace_id})
+    await _mark_workspace_changed(workspace_id)
     
     return {
         "message": "태스크와 연결된 엣지가 삭제되었습니다",
@@ -301,9 +472,12 @@ def delete_task_cascade(
 
 
 @router.post("/sync", response_model=SyncResponse)
-def sync_tasks(
+async def sync_tasks(
     sync_request: SyncRequest,
-    x_workspace_id: str = Header(..., alias="X-Workspace-ID"),
+    response: Response,
+    background_tasks: BackgroundTasks,
+    workspace_id: str = Depends(get_workspace_id),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     오프라인에서 생성/수정/삭제된 데이터를 서버와 동기화합니다.
@@ -313,16 +487,18 @@ def sync_tasks(
     2. 서버는 각 항목을 upsert (존재하면 업데이트, 없으면 생성)
     3. deleted=True인 항목은 서버에서 삭제
     4. 동기화 완료 후 서버의 최신 데이터를 반환
+       (반영된 변경이 없고 If-None-Match == ETag이면 304 응답, 그래프 API와 같은 ETag 사용)
     
     Args:
         sync_request: 동기화할 데이터 (tasks, edges)
-        x_workspace_id: 워크스페이스 고유 식별자 (헤더)
+        response: ETag 헤더를 설정할 응답 객체
+        background_tasks: 임베딩 생성 작업을 등록할 백그라운드 작업 목록
+        workspace_id: 워크스페이스 고유 식별자 (X-Workspace-ID 헤더)
+        if_none_match: 클라이언트가 가진 ETag (헤더, 선택)
         
     Returns:
-        SyncResponse: 동기화 결과 및 서버의 최신 데이터
+        SyncResponse: 동기화 결과 및 서버의 최신 데이터 (ETag 헤더 포함)
     """
-    workspace_id = x_workspace_id
-    
     stats = {
         "tasks_created": 0,
         "tasks_updated": 0,
@@ -335,11 +511,18 @@ def sync_tasks(
     # ========================================
     # 1. 태스크 동기화
     # ========================================
+    # 1-1. 요청에 포함된 태스크들의 서버 상태를 한 번에 조회
+    existing_docs = await tasks_collection.find(
+        {"workspace_id": workspace_id, "id": {"$in": [task.id for task in sync_request.tasks]}},
+        {"_id": 0, "id": 1, "updated_at": 1, "embedding_key": 1, "embedding_pending": 1},
+    ).to_list(length=None)
+    server_tasks = {doc["id"]: doc for doc in existing_docs}
+    
+    # 1-2. 태스크별 처리 방식 결정 (delete / update / create)
+    # (action, task, 임베딩 입력 해시, 임베딩 재생성 여부)
+    actions = []
     for task in sync_request.tasks:
-        existing = tasks_collection.find_one({
-            "id": task.id, 
-            "workspace_id": workspace_id
-        })
+        existing = server_tasks.get(task.id)
         
         # 삭제가 아닌 경우 title 필수 검증
         if not task.deleted and (not task.title or task.title.strip() == ""):
@@ -348,20 +531,12 @@ def sync_tasks(
         if task.deleted:
             # 삭제 요청
             if existing:
-                # 연결된 엣지도 함께 삭제
-                edges_collection.delete_many({
-                    "workspace_id": workspace_id,
-                    "$or": [
-                        {"source": task.id},
-                        {"target": task.id}
-                    ]
-                })
-                tasks_collection.delete_one({
-                    "id": task.id, 
-                    "workspace_id": workspace_id
-                })
-                stats["tasks_deleted"] += 1
-        elif existing:
+                actions.append(("delete", task, None, False))
+                server_tasks.pop(task.id)
+            continue
+        
+        key = embedding_key(embedding_text(task.title, task.description, task.tags))
+        if existing:
             # 업데이트 (서버 데이터가 더 최신이면 스킵)
             server_updated_at = existing.get("updated_at")
             client_updated_at = task.updated_at
@@ -374,169 +549,158 @@ def sync_tasks(
             )
             
             if should_update:
-                task_dict = task.model_dump(exclude={"deleted"})
-                task_dict["workspace_id"] = workspace_id
-                task_dict["updated_at"] = datetime.utcnow()
-                
-                # 임베딩 재생성
-                text_for_embedding = f"{task.title} {task.description or ''} {' '.join(task.tags)}"
-                from main import get_embedding
-                task_dict["embedding"] = get_embedding(text_for_embedding)
-                
-                tasks_collection.update_one(
-                    {"id": task.id, "workspace_id": workspace_id},
-                    {"$set": task_dict}
-                )
-                stats["tasks_updated"] += 1
+                # 제목/설명/태그가 그대로면 저장된 임베딩 재사용 (생성 대기 중이던 태스크는 다시 생성)
+                regenerate = existing.get("embedding_key") != key or existing.get("embedding_pending", False)
+                actions.append(("update", task, key, regenerate))
+                server_tasks[task.id] = {"id": task.id, "updated_at": datetime.utcnow(), "embedding_key": key}
         else:
             # 새로 생성
-            task_dict = task.model_dump(exclude={"deleted"})
-            task_dict["workspace_id"] = workspace_id
-            task_dict["updated_at"] = datetime.utcnow()
-            
-            # 임베딩 생성
-            text_for_embedding = f"{task.title} {task.description or ''} {' '.join(task.tags)}"
-            from main import get_embedding
-            task_dict["embedding"] = get_embedding(text_for_embedding)
-            
-            tasks_collection.insert_one(task_dict)
-            stats["tasks_created"] += 1
-            
-            # 태그 기반 엣지 자동 연결
-            if task.tags:
-                existing_tasks = tasks_collection.find({
-                    "workspace_id": workspace_id,
-                    "id": {"$ne": task.id},
-                    "tags": {"$in": task.tags}
-                })
-                
-                for existing_task in existing_tasks:
-                    common_tags = set(task.tags) & set(existing_task.get("tags", []))
-                    weight = len(common_tags) / max(len(task.tags), len(existing_task.get("tags", [])))
-                    
-                    edge_exists = edges_collection.find_one({
-                        "workspace_id": workspace_id,
-                        "$or": [
-                            {"source": task.id, "target": existing_task["id"]},
-                            {"source": existing_task["id"], "target": task.id}
-                        ]
-                    })
-                    
-                    if not edge_exists:
-                        edges_collection.insert_one({
-                            "workspace_id": workspace_id,
-                            "source": task.id,
-                            "target": existing_task["id"],
-                            "weight": round(weight, 2)
-                        })
-    
-    # ========================================
-    # 2. 엣지 동기화
-    # ========================================
-    for edge in sync_request.edges:
-        existing = edges_collection.find_one({
+            actions.append(("create", task, key, True))
+            server_tasks[task.id] = {"id": task.id, "updated_at": datetime.utcnow(), "embedding_key": key}
+    
+    # 1-3. 내용이 바뀐 태스크의 임베딩은 응답 후 백그라운드에서 일괄 생성 (제목 + 설명 + 태그)
+    # 요청 처리 후의 최종 상태 기준 (같은 요청에서 삭제된 태스크 제외, 같은 태스크는 마지막 내용만)
+    pending_jobs = {}
+    for action, task, key, regenerate in actions:
+        if action == "delete":
+            pending_jobs.pop(task.id, None)
+        elif regenerate:
+            pending_jobs[task.id] = (task.id, embedding_text(task.title, task.description, task.tags), key)
+    embedding_jobs = list(pending_jobs.values())
+    
+    # 1-4. 결정된 순서대로 bulk_write 한 번으로 반영
+    # 삭제되는 태스크의 연결 엣지는 태스크 반영 전에 한 번에 삭제
+    deleted_ids = [task.id for action, task, _, _ in actions if action == "delete"]
+    if deleted_ids:
+        await edges_collection.delete_many({
             "workspace_id": workspace_id,
             "$or": [
-                {"source": edge.source, "target": edge.target},
-                {"source": edge.target, "target": edge.source}
+                {"source": {"$in": deleted_ids}},
+                {"target": {"$in": deleted_ids}}
             ]
         })
+    
+    task_operations = []
+    created_tasks = {}  # 엣지 자동 연결 대상 (생성 후 같은 요청에서 삭제된 태스크 제외)
+    for action, task, key, regenerate in actions:
+        task_filter = {"id": task.id, "workspace_id": workspace_id}
+        if action == "delete":
+            task_operations.append(DeleteOne(task_filter))
+            created_tasks.pop(task.id, None)
+            continue
         
-        if edge.deleted:
-            if existing:
-                edges_collection.delete_one({"_id": existing["_id"]})
-                stats["edges_deleted"] += 1
-        elif existing:
-            edges_collection.update_one(
-                {"_id": existing["_id"]},
-                {"$set": {"weight": edge.weight}}
-            )
-            stats["edges_updated"] += 1
+        task_dict = task.model_dump(exclude={"deleted"})
+        task_dict["workspace_id"] = workspace_id
+        task_dict["updated_at"] = datetime.utcnow()
+        
+        if not regenerate:
+            # 저장된 임베딩 유지, 나머지 필드만 갱신
+            task_operations.append(UpdateOne(task_filter, {"$set": task_dict}))
+            continue
+        
+        # 임베딩 생성 대기 상태로 저장 (수정은 새 임베딩이 저장될 때까지 기존 임베딩 유지)
+        task_dict.update(_pending_embedding_fields(key))
+        
+        if action == "update":
+            task_operations.append(UpdateOne(task_filter, {"$set": task_dict}))
         else:
-            # source와 target 태스크가 존재하는지 확인
-            source_exists = tasks_collection.find_one({
-                "id": edge.source, 
-                "workspace_id": workspace_id
-            })
-            target_exists = tasks_collection.find_one({
-                "id": edge.target, 
-                "workspace_id": workspace_id
-            })
-            
-            if source_exists and target_exists:
-                edges_collection.insert_one({
-                    "workspace_id": workspace_id,
-                    "source": edge.source,
-                    "target": edge.target,
-                    "weight": edge.weight
-                })
-                stats["edges_created"] += 1
+            task_operations.append(InsertOne(task_dict))
+            created_tasks[task.id] = task
+    
+    if task_operations:
+        result = await _bulk_write(tasks_collection, task_operations, _has_repeated_keys(
+            task.id for _, task, _, _ in actions
+        ))
+        stats["tasks_created"] = result["nInserted"]
+        stats["tasks_updated"] = result["nMatched"]
+        stats["tasks_deleted"] = result["nRemoved"]
+    
+    # 태그 기반 엣지 자동 연결
+    for task in created_tasks.values():
+        await _link_tasks_by_tags(workspace_id, task.id, task.tags)
     
     # ========================================
-    # 3. 서버의 최신 데이터 반환 (PCA 좌표 포함)
+    # 2. 엣지 동기화
     # ========================================
-    import numpy as np
-    from sklearn.decomposition import PCA
-    from sklearn.preprocessing import StandardScaler
-    
-    # 현재 워크스페이스의 모든 태스크
-    all_tasks = list(tasks_collection.find({"workspace_id": workspace_id}))
-    
-    # PCA 좌표 계산
-    embeddings = []
-    tasks_with_embedding = []
-    
-    for task in all_tasks:
-        embedding = task.get("embedding", [])
-        if embedding:
-            embeddings.append(embedding)
-            tasks_with_embedding.append(task)
-    
-    coordinates = {}
-    if len(embeddings) >= 2:
-        pca = PCA(n_components=2)
-        coords_2d = pca.fit_transform(np.array(embeddings))
-        
-        scaler = StandardScaler()
-        coords_2d = scaler.fit_transform(coords_2d) * 40
-        
-        for i, task in enumerate(tasks_with_embedding):
-            coordinates[task.get("id")] = {
-                "x": float(coords_2d[i][0]),
-                "y": float(coords_2d[i][1])
-            }
-    
-    # 태스크 응답 생성 (PCA 좌표 포함)
-    tasks_response = []
-    for task in all_tasks:
-        task_id = task.get("id")
-        coord = coordinates.get(task_id, {"x": 0.0, "y": 0.0})
+    # 2-1. 요청에 포함된 엣지들의 서버 상태와 양 끝 태스크 존재 여부를 동시에 조회
+    endpoint_ids = list({edge.source for edge in sync_request.edges} | {edge.target for edge in sync_request.edges})
+    if endpoint_ids:
+        existing_edges, endpoint_docs = await asyncio.gather(
+            edges_collection.find(
+                {"workspace_id": workspace_id, "source": {"$in": endpoint_ids}, "target": {"$in": endpoint_ids}},
+                {"_id": 0, "workspace_id": 1, "source": 1, "target": 1},
+            ).to_list(length=None),
+            tasks_collection.find(
+                {"workspace_id": workspace_id, "id": {"$in": endpoint_ids}},
+                {"_id": 0, "id": 1},
+            ).to_list(length=None),
+        )
+    else:
+        existing_edges, endpoint_docs = [], []
+    # 서버에 이미 있는 엣지의 (source, target) - 저장 순서(source < target) 기준
+    server_edges = {(doc["source"], doc["target"]) for doc in existing_edges}
+    existing_task_ids = {doc["id"] for doc in endpoint_docs}
+    
+    # 2-2. 엣지별 작업 결정 후 bulk_write 한 번으로 반영
+    edge_operations = []
+    edge_keys = [edge_endpoints(edge.source, edge.target) for edge in sync_request.edges]
+    for edge, key in zip(sync_request.edges, edge_keys):
+        edge_filter = {"workspace_id": workspace_id, "source": key[0], "target": key[1]}
         
-        tasks_response.append({
-            "workspace_id": task.get("workspace_id"),
-            "id": task_id,
-            "title": task.get("title"),
-            "description": task.get("description"),
-            "priority": task.get("priority", "medium"),
-            "status": task.get("status", "todo"),
-            "category": task.get("category", "general"),
-            "tags": task.get("tags", []),
-            "embedding": task.get("embedding", []),
-            "due_date": task.get("due_date"),
-            "x": coord["x"],
-            "y": coord["y"],
-        })
+        if edge.deleted:
+            if key in server_edges:
+                edge_operations.append(DeleteOne(edge_filter))
+                server_edges.discard(key)
+        elif key in server_edges:
+            edge_operations.append(UpdateOne(edge_filter, {"$set": {"weight": edge.weight}}))
+        elif edge.source in existing_task_ids and edge.target in existing_task_ids:
+            # source와 target 태스크가 모두 존재할 때만 생성
+            edge_operations.append(InsertOne({**edge_filter, "weight": edge.weight}))
+            server_edges.add(key)
+    
+    if edge_operations:
+        result = await _bulk_write(edges_collection, edge_operations, _has_repeated_keys(edge_keys))
+        stats["edges_created"] = result["nInserted"]
+        stats["edges_updated"] = result["nMatched"]
+        stats["edges_deleted"] = result["nRemoved"]
+    
+    # ========================================
+    # 3. 서버의 최신 데이터 반환 (PCA 좌표 포함)
+    # ========================================
+    # 변경사항이 있으면 캐시 무효화 및 버전 증가 후 재조회
+    # 생성/재생성 임베딩은 _store_embeddings가 저장하면서 좌표에 반영하므로,
+    # 여기서 좌표가 바뀌는 경우는 (임베딩이 있던) 태스크 삭제뿐
+    changed = any(stats.values())
+    if changed:
+        await _mark_workspace_changed(workspace_id, keep_pca_cache=not stats["tasks_deleted"])
+    if embedding_jobs:
+        background_tasks.add_task(_store_embeddings, workspace_id, embedding_jobs)
+    
+    # 조회 전에 버전을 읽어 두어, 조회 중 변경이 생겨도 다음 요청에서 다시 받도록 함
+    version, pca_version = await get_workspace_versions(workspace_id)
+    etag = workspace_etag(workspace_id, version, pca_version, pca_fit_version(workspace_id, pca_version))
+    if not changed and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    
+    # 현재 워크스페이스의 모든 태스크 (응답에 임베딩을 싣지 않으므로 임베딩 필드 제외)
+    all_tasks = await tasks_collection.find(
+        {"workspace_id": workspace_id}, EXCLUDE_EMBEDDING_PROJECTION
+    ).batch_size(GRAPH_BATCH_SIZE).to_list(length=None)
+    
+    # PCA 좌표 (캐시가 없으면 계산)
+    _, coordinates, fit_version = await get_pca_coordinates(workspace_id, pca_version)
+    # ETag는 실제로 사용한 좌표의 학습 버전으로 계산 (조회 중 캐시가 바뀌었을 수 있음)
+    response.headers["ETag"] = workspace_etag(workspace_id, version, pca_version, fit_version)
+    response.headers["Cache-Control"] = "no-cache"
+    
+    # 태스크 응답 생성 (PCA 좌표 포함, 좌표가 없으면 모델 기본값 0.0)
+    tasks_response = [{**task, **coordinates.get(task["id"], {})} for task in all_tasks]
     
     # 현재 워크스페이스의 모든 엣지
-    all_edges = list(edges_collection.find({"workspace_id": workspace_id}))
-    edges_response = []
-    for edge in all_edges:
-        edges_response.append({
-            "workspace_id": edge.get("workspace_id"),
-            "source": edge.get("source"),
-            "target": edge.get("target"),
-            "weight": edge.get("weight", 0.5),
-        })
+    edges_response = await edges_collection.find(
+        {"workspace_id": workspace_id},
+        {"_id": 0, "workspace_id": 1, "source": 1, "target": 1, "weight": 1}
+    ).batch_size(GRAPH_BATCH_SIZE).to_list(length=None)
     
     return SyncResponse(
         tasks=tasks_response,